@@ -1,2 +1,23 @@
-from .models import *
-from .plugin import *
+"""HAUS utilities.
+
+Names from haus_utils.plugin and haus_utils.models are available here, but are only
+imported when first accessed. Plugin code that sticks to plugin names (Plugin,
+PluginEntity, EntityAction, ...) never loads the database dependencies."""
+
+from . import plugin, models
+
+__all__ = [*plugin.__all__, *models.__all__]
+
+
+def __getattr__(name: str):
+    for package in (plugin, models):
+        if name in package.__all__:
+            value = getattr(package, name)
+            globals()[name] = value
+            return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals().keys(), *__all__])
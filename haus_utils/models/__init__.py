@@ -1,7 +1,93 @@
-from .config import *
-from .base import *
-from .users import *
-from .scopes import APPLICATION_SCOPES, ScopeDefinition, ScopeCollection
-from .views import *
+"""Server-side models. Most of these depend on beanie (and through it motor/pymongo),
+so submodules are loaded on first attribute access rather than on import."""
 
-DOCUMENT_TYPES = [Session, User, View]
+from importlib import import_module
+
+_EXPORTS = {
+    "ServerDatabaseConfig": ".config",
+    "ServerSecuritySessionsConfig": ".config",
+    "ServerSecurityAccessLevelsConfig": ".config",
+    "ServerSecurityUsersDefaultConfig": ".config",
+    "ServerSecurityUsersConfig": ".config",
+    "ServerSecurityConfig": ".config",
+    "ServerConfig": ".config",
+    "PluginsConfig": ".config",
+    "Config": ".config",
+    "BaseDocument": ".base",
+    "ExpirableDocument": ".base",
+    "BlobReference": ".blobs",
+    "ImagePyramidLevel": ".blobs",
+    "ImagePyramid": ".blobs",
+    "ImageReference": ".blobs",
+    "Blob": ".blobs",
+    "BlobChunk": ".blobs",
+    "BlobStore": ".blobs",
+    "DocumentBlobStore": ".blobs",
+    "LocalBlobStore": ".blobs",
+    "decode_data_url": ".blobs",
+    "store_image": ".blobs",
+    "load_pyramid": ".blobs",
+    "Session": ".users",
+    "RedactedUser": ".users",
+    "User": ".users",
+    "APPLICATION_SCOPES": ".scopes",
+    "ScopeDefinition": ".scopes",
+    "ScopeCollection": ".scopes",
+    "ViewServerScope": ".views",
+    "ViewUserScope": ".views",
+    "ViewPanelPlacement": ".views",
+    "Macro": ".views",
+    "ViewParent": ".views",
+    "BaseViewPanel": ".views",
+    "EntityViewPanel": ".views",
+    "BaseView": ".views",
+    "PanelledView": ".views",
+    "MapViewStateFilterAttributes": ".views",
+    "MapViewStateFilter": ".views",
+    "MapViewInteractableState": ".views",
+    "EntityIdentifier": ".views",
+    "MapViewInteractable": ".views",
+    "MapView": ".views",
+}
+
+__all__ = [*_EXPORTS.keys(), "DOCUMENT_TYPES"]
+
+
+def _document_types() -> list:
+    from .blobs import Blob, BlobChunk
+    from .users import Session, User
+    from .views import (
+        BaseView,
+        PanelledView,
+        MapView,
+        BaseViewPanel,
+        EntityViewPanel,
+    )
+
+    return [
+        Session,
+        User,
+        BaseView,
+        PanelledView,
+        MapView,
+        BaseViewPanel,
+        EntityViewPanel,
+        Blob,
+        BlobChunk,
+    ]
+
+
+def __getattr__(name: str):
+    if name == "DOCUMENT_TYPES":
+        value = _document_types()
+    elif name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals().keys(), *__all__])
@@ -0,0 +1,393 @@
+import asyncio
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from tempfile import mkstemp
+from base64 import b64decode
+from hashlib import sha256
+from io import BytesIO
+from typing import Optional
+from urllib.parse import unquote_to_bytes
+from beanie import Indexed
+from pydantic import BaseModel
+from .base import BaseDocument
+
+CHUNK_SIZE = 255 * 1024
+TILE_SIZE = 256
+_BLOB_HASH = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobReference(BaseModel):
+    hash: str
+    size: int
+    content_type: str
+
+
+class ImagePyramidLevel(BaseModel):
+    level: int
+    width: int
+    height: int
+    columns: int
+    rows: int
+    tiles: list[str]
+
+    def tile(self, x: int, y: int) -> str:
+        return self.tiles[y * self.columns + x]
+
+
+class ImagePyramid(BaseModel):
+    tile_size: int
+    tile_type: str
+    levels: list[ImagePyramidLevel]
+
+    def level_for(self, width: int) -> ImagePyramidLevel:
+        """Picks the smallest pyramid level at least as wide as the rendered width.
+
+        Args:
+            width (int): Width the client renders the image at, in pixels
+
+        Returns:
+            ImagePyramidLevel: Matching level (level 0 is full resolution)
+        """
+        for level in reversed(self.levels):
+            if level.width >= width:
+                return level
+        return self.levels[0]
+
+
+class ImageReference(BlobReference):
+    """Source image blob plus the hash of its ImagePyramid manifest blob. Tile hashes
+    live in the manifest, keeping documents that embed this reference small."""
+
+    width: int
+    height: int
+    pyramid: str
+
+
+class Blob(BaseDocument):
+    size: int
+    content_type: str
+    chunk_size: int
+
+    class Settings:
+        name = "blobs"
+
+
+class BlobChunk(BaseDocument):
+    blob: Indexed(str)
+    index: int
+    data: bytes
+
+    class Settings:
+        name = "blob_chunks"
+
+
+def _check_hash(hash: str) -> str:
+    # Hashes can come from client requests (ie tile fetches), so never trust them as paths/IDs.
+    if not isinstance(hash, str) or not _BLOB_HASH.match(hash):
+        raise ValueError(f"Invalid blob hash: {hash!r}")
+    return hash
+
+
+def _write_once(path: str, data: bytes):
+    # Concurrent puts of the same blob each write their own temp file. Whoever
+    # replaces first wins; identical content makes the others no-ops.
+    if os.path.exists(path):
+        return
+    fd, temp = mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+        if not os.path.exists(path):
+            raise
+
+
+def _normalize_range(size: int, start: int, end: Optional[int]) -> tuple[int, int]:
+    end = size if end is None else min(end, size)
+    start = max(start, 0)
+    return start, max(start, end)
+
+
+class BlobStore(ABC):
+    """Content-addressed blob storage. Blobs are keyed by the sha256 of their data,
+    so storing identical data twice only keeps one copy."""
+
+    @abstractmethod
+    async def info(self, hash: str) -> Optional[BlobReference]:
+        pass
+
+    @abstractmethod
+    async def _write(self, reference: BlobReference, data: bytes):
+        pass
+
+    @abstractmethod
+    async def read(self, hash: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Reads a blob, or a byte range of it.
+
+        Args:
+            hash (str): Blob hash
+            start (int, optional): First byte. Defaults to 0.
+            end (Optional[int], optional): Byte after the last byte to read. Defaults to the end of the blob.
+
+        Returns:
+            bytes: Requested data
+        """
+
+    @abstractmethod
+    async def delete(self, hash: str):
+        pass
+
+    async def exists(self, hash: str) -> bool:
+        return (await self.info(hash)) is not None
+
+    async def put(self, data: bytes, content_type: str) -> BlobReference:
+        hash = sha256(data).hexdigest()
+        existing = await self.info(hash)
+        if existing:
+            return existing
+
+        reference = BlobReference(hash=hash, size=len(data), content_type=content_type)
+        await self._write(reference, data)
+        return reference
+
+
+class DocumentBlobStore(BlobStore):
+    """Stores blobs in MongoDB, split into BlobChunk documents (GridFS-style)."""
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    async def info(self, hash: str) -> Optional[BlobReference]:
+        blob = await Blob.get(_check_hash(hash))
+        if not blob:
+            return None
+        return BlobReference(hash=blob.id, size=blob.size, content_type=blob.content_type)
+
+    async def _write(self, reference: BlobReference, data: bytes):
+        # Chunks first, so a Blob document only exists once its data is complete.
+        for index, offset in enumerate(range(0, len(data), self.chunk_size)):
+            await BlobChunk(
+                id=f"{reference.hash}:{index}",
+                blob=reference.hash,
+                index=index,
+                data=data[offset : offset + self.chunk_size],
+            ).save()
+
+        await Blob(
+            id=reference.hash,
+            size=reference.size,
+            content_type=reference.content_type,
+            chunk_size=self.chunk_size,
+        ).save()
+
+    async def read(self, hash: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        blob = await Blob.get(_check_hash(hash))
+        if not blob:
+            raise KeyError(hash)
+
+        start, end = _normalize_range(blob.size, start, end)
+        if start == end:
+            return b""
+
+        first = start // blob.chunk_size
+        last = (end - 1) // blob.chunk_size
+        chunks = (
+            await BlobChunk.find(
+                BlobChunk.blob == hash,
+                BlobChunk.index >= first,
+                BlobChunk.index <= last,
+            )
+            .sort(+BlobChunk.index)
+            .to_list()
+        )
+        offset = first * blob.chunk_size
+        return b"".join([c.data for c in chunks])[start - offset : end - offset]
+
+    async def delete(self, hash: str):
+        blob = await Blob.get(_check_hash(hash))
+        if blob:
+            await blob.delete()
+        await BlobChunk.find(BlobChunk.blob == hash).delete()
+
+
+class LocalBlobStore(BlobStore):
+    """Stores blobs as files in a local folder. Stand-in for DocumentBlobStore in
+    development & tests."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    def _path(self, hash: str) -> str:
+        _check_hash(hash)
+        return os.path.join(self.folder, hash[:2], hash)
+
+    def _read_info(self, hash: str) -> Optional[BlobReference]:
+        try:
+            with open(self._path(hash) + ".json", "r") as f:
+                return BlobReference(**json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def _write_files(self, reference: BlobReference, data: bytes):
+        path = self._path(reference.hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_once(path, data)
+        _write_once(path + ".json", reference.model_dump_json().encode())
+
+    def _read_range(self, hash: str, start: int, end: Optional[int]) -> bytes:
+        path = self._path(hash)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            raise KeyError(hash)
+
+        start, end = _normalize_range(size, start, end)
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def _delete_files(self, hash: str):
+        for path in (self._path(hash) + ".json", self._path(hash)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def info(self, hash: str) -> Optional[BlobReference]:
+        return await asyncio.to_thread(self._read_info, _check_hash(hash))
+
+    async def _write(self, reference: BlobReference, data: bytes):
+        await asyncio.to_thread(self._write_files, reference, data)
+
+    async def read(self, hash: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        return await asyncio.to_thread(self._read_range, _check_hash(hash), start, end)
+
+    async def delete(self, hash: str):
+        await asyncio.to_thread(self._delete_files, _check_hash(hash))
+
+
+def decode_data_url(url: str) -> tuple[bytes, str]:
+    """Decodes a data: URL.
+
+    Args:
+        url (str): data:[<mediatype>][;base64],<data>
+
+    Returns:
+        tuple[bytes, str]: Data & content type
+    """
+    header, payload = url.split(",", maxsplit=1)
+    params = header.removeprefix("data:").split(";")
+    content_type = params[0] or "text/plain"
+    if "base64" in params[1:]:
+        return b64decode(payload), content_type
+    return unquote_to_bytes(payload), content_type
+
+
+def _build_pyramid(
+    data: bytes, tile_size: int, format: str
+) -> tuple[int, int, list[tuple[int, int, int, int, list[bytes]]]]:
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError(
+            "Pillow is required to generate image tiles (install haus-utils[images])"
+        )
+
+    image = Image.open(BytesIO(data))
+    image.load()
+    if format.upper() == "JPEG":
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    width, height = image.size
+    levels = []
+    current = image
+    while True:
+        w, h = current.size
+        columns = -(-w // tile_size)
+        rows = -(-h // tile_size)
+        tiles = []
+        for y in range(rows):
+            for x in range(columns):
+                tile = current.crop(
+                    (
+                        x * tile_size,
+                        y * tile_size,
+                        min((x + 1) * tile_size, w),
+                        min((y + 1) * tile_size, h),
+                    )
+                )
+                buffer = BytesIO()
+                tile.save(buffer, format=format)
+                tiles.append(buffer.getvalue())
+        levels.append((w, h, columns, rows, tiles))
+
+        if columns == 1 and rows == 1:
+            break
+        current = current.resize(
+            (max(1, w // 2), max(1, h // 2)), Image.Resampling.LANCZOS
+        )
+
+    return width, height, levels
+
+
+async def store_image(
+    store: BlobStore,
+    data: bytes,
+    content_type: str,
+    tile_size: int = TILE_SIZE,
+    format: str = "WEBP",
+) -> ImageReference:
+    """Stores an image & its tile pyramid.
+
+    Args:
+        store (BlobStore): Target store
+        data (bytes): Encoded image
+        content_type (str): Image MIME type
+        tile_size (int, optional): Tile edge length in pixels. Defaults to TILE_SIZE.
+        format (str, optional): Pillow format to encode tiles in. Defaults to "WEBP".
+
+    Returns:
+        ImageReference: Reference to the original image & its pyramid manifest
+    """
+    # Tiles are built before anything is stored, so a decoding failure (or missing
+    # Pillow) doesn't leave an orphaned source blob behind.
+    width, height, levels = await asyncio.to_thread(
+        _build_pyramid, data, tile_size, format
+    )
+    tile_type = f"image/{format.lower()}"
+    pyramid = ImagePyramid(
+        tile_size=tile_size,
+        tile_type=tile_type,
+        levels=[
+            ImagePyramidLevel(
+                level=index,
+                width=w,
+                height=h,
+                columns=columns,
+                rows=rows,
+                tiles=[(await store.put(t, tile_type)).hash for t in tiles],
+            )
+            for index, (w, h, columns, rows, tiles) in enumerate(levels)
+        ],
+    )
+    manifest = await store.put(pyramid.model_dump_json().encode(), "application/json")
+    source = await store.put(data, content_type)
+
+    return ImageReference(
+        **source.model_dump(),
+        width=width,
+        height=height,
+        pyramid=manifest.hash,
+    )
+
+
+async def load_pyramid(store: BlobStore, image: ImageReference) -> ImagePyramid:
+    """Loads the tile pyramid manifest of a stored image."""
+    return ImagePyramid.model_validate_json(await store.read(image.pyramid))
@@ -2,6 +2,8 @@ from typing import Any, Literal, Optional, Union
 from pydantic import BaseModel, Field
 from secrets import token_urlsafe
 from .base import BaseDocument
+from ..plugin.query import PropertyFilter
+from .blobs import BlobStore, ImageReference, decode_data_url, store_image
 
 
 class ViewServerScope(BaseModel):
@@ -23,6 +25,7 @@ class ViewPanelPlacement(BaseModel):
 class Macro(BaseModel):
     id: str = Field(default_factory=lambda: token_urlsafe())
     plugin_id: str
+    action_id: Optional[str] = None
     target: Optional[str] = None
     field_values: Optional[dict[str, Any]] = {}
     icon: str
@@ -72,10 +75,8 @@ class PanelledView(BaseView):
     type: Literal["panelled"] = "panelled"
 
 
-class MapViewStateFilterAttributes(BaseModel):
-    attribute: str
-    value: Any
-    operation: Literal["eq", "ne", "gt", "lt", "ge", "le"]
+class MapViewStateFilterAttributes(PropertyFilter):
+    pass
 
 
 class MapViewStateFilter(BaseModel):
@@ -108,5 +109,23 @@ class MapViewInteractable(BaseModel):
 
 class MapView(BaseView):
     type: Literal["map"] = "map"
-    image: str
+    image: Union[ImageReference, str]
     interactables: list[MapViewInteractable]
+
+    async def offload_image(self, store: BlobStore) -> ImageReference:
+        """Moves an embedded data URL image into a blob store, replacing it with a reference.
+
+        Args:
+            store (BlobStore): Store to place the image & its tiles in
+
+        Returns:
+            ImageReference: New image reference
+        """
+        if isinstance(self.image, ImageReference):
+            return self.image
+        if not self.image.startswith("data:"):
+            raise ValueError("Only data URL images can be offloaded")
+
+        data, content_type = decode_data_url(self.image)
+        self.image = await store_image(store, data, content_type)
+        return self.image
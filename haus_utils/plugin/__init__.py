@@ -1,2 +1,74 @@
-from .plugin import Plugin
-from .types import *
+"""Plugin-side utilities. Imports nothing database-related, so plugin processes
+can use this package directly (or through the top-level haus_utils package) without
+loading beanie/motor/pymongo. Submodules are loaded on first attribute access."""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "Plugin": ".plugin",
+    "PluginPypiDepenency": ".types",
+    "PluginField": ".types",
+    "PluginStringField": ".types",
+    "PluginNumberField": ".types",
+    "PluginSwitchField": ".types",
+    "PluginMetadata": ".types",
+    "PluginRun": ".types",
+    "PluginConfig": ".types",
+    "DisplayData": ".types",
+    "BaseActionField": ".types",
+    "StringActionField": ".types",
+    "NumberActionField": ".types",
+    "BooleanActionField": ".types",
+    "SelectionActionOptions": ".types",
+    "SelectionActionField": ".types",
+    "DateActionField": ".types",
+    "TimeActionField": ".types",
+    "DateTimeActionField": ".types",
+    "ColorActionField": ".types",
+    "EntitySelectorActionField": ".types",
+    "JSONActionField": ".types",
+    "ENTITY_ACTION_FIELDS": ".types",
+    "EntityAction": ".types",
+    "ActionCall": ".types",
+    "BaseEntityProperty": ".types",
+    "StringEntityProperty": ".types",
+    "NumberEntityProperty": ".types",
+    "BooleanEntityProperty": ".types",
+    "ListEntityProperty": ".types",
+    "TablePropertyColumn": ".types",
+    "TableEntityProperty": ".types",
+    "DateEntityProperty": ".types",
+    "ColorEntityProperty": ".types",
+    "ENTITY_PROPERTIES": ".types",
+    "PluginEntity": ".types",
+    "PluginEvent": ".types",
+    "MacroExecutor": ".macros",
+    "MacroResult": ".macros",
+    "PropertyFilter": ".query",
+    "EntityQuery": ".query",
+    "EntityCursor": ".query",
+    "EntityPage": ".query",
+    "EntityQueryChange": ".query",
+    "EntityIndex": ".query",
+    "QuerySubscription": ".query",
+    "compile_query": ".query",
+    "ActionFieldError": ".validation",
+    "ActionValidationResult": ".validation",
+    "ActionValidator": ".validation",
+    "get_validator": ".validation",
+    "validate_action": ".validation",
+}
+
+__all__ = list(_EXPORTS.keys())
+
+
+def __getattr__(name: str):
+    if not name in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals().keys(), *__all__])
@@ -0,0 +1,292 @@
+import asyncio
+import json
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Literal, Optional
+from pydantic import BaseModel, Field
+from .plugin import Plugin
+from .types import *
+from .validation import ActionFieldError, validate_action
+
+if TYPE_CHECKING:
+    from ..models.views import Macro
+
+
+class MacroResult(BaseModel):
+    macro: str
+    plugin: str
+    action: Optional[str] = None
+    outcome: Literal["success", "error", "invalid", "skipped"]
+    result: Any = None
+    error: Optional[str] = None
+    validation_errors: list[ActionFieldError] = Field(default_factory=list)
+    latency: float = 0
+    deduplicated: bool = False
+
+
+def _invocation_key(
+    plugin_id: str, call: ActionCall
+) -> tuple[str, str, Optional[str], str]:
+    return (
+        plugin_id,
+        call.action_id,
+        call.target,
+        json.dumps(call.fields, sort_keys=True, default=str),
+    )
+
+
+class MacroExecutor:
+    """Runs groups of macros against loaded plugins.
+
+    Macros are grouped by plugin & plugin groups run concurrently. Plugins that
+    override Plugin.call_actions receive batches of up to batch_size calls, and their
+    limit counts in-flight batches. Other plugins get one call per dispatch, so their
+    limit counts in-flight calls. Identical invocations (same plugin, action, target
+    & fields) that are already running are awaited instead of dispatched again.
+
+    Actions fetched for validation are cached; call invalidate() when a plugin's
+    actions change.
+    """
+
+    def __init__(
+        self,
+        plugins: dict[str, Plugin],
+        concurrency: int = 4,
+        limits: Optional[dict[str, int]] = None,
+        batch_size: int = 16,
+        validate: bool = True,
+    ):
+        self.plugins = plugins
+        self.concurrency = concurrency
+        self.limits = limits or {}
+        self.batch_size = batch_size
+        self.validate = validate
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._actions: dict[tuple[str, str], EntityAction] = {}
+
+    def semaphore(self, plugin_id: str) -> asyncio.Semaphore:
+        if not plugin_id in self._semaphores:
+            self._semaphores[plugin_id] = asyncio.Semaphore(
+                max(1, self.limits.get(plugin_id, self.concurrency))
+            )
+        return self._semaphores[plugin_id]
+
+    def batch_size_for(self, plugin: Plugin) -> int:
+        # The default call_actions just gathers call_action, so batching it would let
+        # one permit cover many concurrent calls.
+        if type(plugin).call_actions is Plugin.call_actions:
+            return 1
+        return max(1, self.batch_size)
+
+    def register_actions(
+        self, actions: list[EntityAction], plugin_id: Optional[str] = None
+    ):
+        """Adds already-resolved actions to the cache, skipping get_actions for them.
+
+        Args:
+            actions (list[EntityAction]): Actions to cache
+            plugin_id (Optional[str], optional): Plugin the actions belong to. Defaults to each action's plugin.
+        """
+        for action in actions:
+            self._actions[(plugin_id or action.plugin, action.id)] = action
+
+    def invalidate(self, plugin_id: Optional[str] = None, action_id: Optional[str] = None):
+        """Drops cached actions.
+
+        Args:
+            plugin_id (Optional[str], optional): Plugin to invalidate. Defaults to all plugins.
+            action_id (Optional[str], optional): Single action to invalidate. Defaults to all of the plugin's actions.
+        """
+        self._actions = {
+            key: action
+            for key, action in self._actions.items()
+            if not (
+                (plugin_id == None or key[0] == plugin_id)
+                and (action_id == None or key[1] == action_id)
+            )
+        }
+
+    async def execute(self, macros: list["Macro"]) -> list[MacroResult]:
+        """Executes a set of macros concurrently.
+
+        Args:
+            macros (list[Macro]): Macros to run (ie EntityViewPanel.macros)
+
+        Returns:
+            list[MacroResult]: Per-macro outcome & latency, in the same order as macros
+        """
+        start = perf_counter()
+        results: list[Optional[MacroResult]] = [None] * len(macros)
+        groups: dict[str, list[tuple[int, "Macro"]]] = {}
+        for index, macro in enumerate(macros):
+            groups.setdefault(macro.plugin_id, []).append((index, macro))
+
+        await asyncio.gather(
+            *[
+                self._execute_group(plugin_id, group, results, start)
+                for plugin_id, group in groups.items()
+            ]
+        )
+        return results
+
+    async def _resolve_calls(
+        self,
+        plugin_id: str,
+        plugin: Plugin,
+        entries: list[tuple[int, "Macro"]],
+        results: list[Optional[MacroResult]],
+    ) -> list[tuple[int, ActionCall]]:
+        calls = []
+        runnable = []
+        for index, macro in entries:
+            if macro.action_id:
+                runnable.append((index, macro))
+            else:
+                results[index] = MacroResult(
+                    macro=macro.id,
+                    plugin=macro.plugin_id,
+                    outcome="skipped",
+                    error="Macro has no action",
+                )
+
+        if self.validate:
+            missing = list(
+                {
+                    macro.action_id
+                    for _, macro in runnable
+                    if not (plugin_id, macro.action_id) in self._actions
+                }
+            )
+            if len(missing) > 0:
+                self.register_actions(await plugin.get_actions(missing), plugin_id)
+
+        for index, macro in runnable:
+            fields = macro.field_values or {}
+            if self.validate:
+                action = self._actions.get((plugin_id, macro.action_id))
+                if not action:
+                    results[index] = MacroResult(
+                        macro=macro.id,
+                        plugin=macro.plugin_id,
+                        action=macro.action_id,
+                        outcome="error",
+                        error="Unknown action",
+                    )
+                    continue
+
+                validated = validate_action(action, fields)
+                if not validated.valid:
+                    results[index] = MacroResult(
+                        macro=macro.id,
+                        plugin=macro.plugin_id,
+                        action=macro.action_id,
+                        outcome="invalid",
+                        validation_errors=validated.errors,
+                    )
+                    continue
+                fields = validated.values
+
+            calls.append(
+                (
+                    index,
+                    ActionCall(
+                        action_id=macro.action_id, target=macro.target, fields=fields
+                    ),
+                )
+            )
+
+        return calls
+
+    async def _dispatch(
+        self, plugin_id: str, plugin: Plugin, batch: list[tuple[tuple, ActionCall]]
+    ):
+        values: list[Any] = [asyncio.CancelledError()] * len(batch)
+        try:
+            async with self.semaphore(plugin_id):
+                returned = await plugin.call_actions([call for _, call in batch])
+            if len(returned) != len(batch):
+                raise RuntimeError(
+                    f"Expected {len(batch)} results from call_actions, got {len(returned)}"
+                )
+            values = returned
+        except Exception as e:
+            values = [e] * len(batch)
+        finally:
+            for (key, _), value in zip(batch, values):
+                future = self._inflight.pop(key)
+                if not future.done():
+                    future.set_result(value)
+
+    async def _execute_group(
+        self,
+        plugin_id: str,
+        entries: list[tuple[int, "Macro"]],
+        results: list[Optional[MacroResult]],
+        start: float,
+    ):
+        macros = {index: macro for index, macro in entries}
+
+        def fail(indices: list[int], error: str):
+            for index in indices:
+                results[index] = MacroResult(
+                    macro=macros[index].id,
+                    plugin=plugin_id,
+                    action=macros[index].action_id,
+                    outcome="error",
+                    error=error,
+                    latency=perf_counter() - start,
+                )
+
+        plugin = self.plugins.get(plugin_id)
+        if not plugin:
+            return fail(list(macros.keys()), "Unknown plugin")
+
+        try:
+            calls = await self._resolve_calls(plugin_id, plugin, entries, results)
+        except Exception as e:
+            return fail(
+                [i for i in macros.keys() if not results[i]],
+                f"{type(e).__name__}: {e}",
+            )
+
+        waiting: dict[tuple, list[int]] = {}
+        owned: list[tuple[tuple, ActionCall]] = []
+        for index, call in calls:
+            key = _invocation_key(plugin_id, call)
+            if not key in waiting:
+                waiting[key] = []
+                if not key in self._inflight:
+                    self._inflight[key] = asyncio.get_running_loop().create_future()
+                    owned.append((key, call))
+            waiting[key].append(index)
+
+        owned_keys = {key for key, _ in owned}
+        futures = {key: self._inflight[key] for key in waiting.keys()}
+
+        async def collect(key: tuple, indices: list[int]):
+            value = await futures[key]
+            latency = perf_counter() - start
+            for position, index in enumerate(indices):
+                result = MacroResult(
+                    macro=macros[index].id,
+                    plugin=plugin_id,
+                    action=macros[index].action_id,
+                    outcome="success",
+                    latency=latency,
+                    deduplicated=position > 0 or not key in owned_keys,
+                )
+                if isinstance(value, BaseException):
+                    result.outcome = "error"
+                    result.error = f"{type(value).__name__}: {value}"
+                else:
+                    result.result = value
+                results[index] = result
+
+        batch_size = self.batch_size_for(plugin)
+        await asyncio.gather(
+            *[
+                self._dispatch(plugin_id, plugin, owned[i : i + batch_size])
+                for i in range(0, len(owned), batch_size)
+            ],
+            *[collect(key, indices) for key, indices in waiting.items()],
+        )
@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import AsyncGenerator
 from typing import Any, Optional
 from .types import *
@@ -23,5 +24,19 @@ class Plugin:
     async def call_action(self, action_id: str, target: str, fields: dict[str, Any]):
         pass
 
+    async def call_actions(self, calls: list[ActionCall]) -> list[Any]:
+        """Calls several actions at once. Override for plugins with native batching.
+
+        Args:
+            calls (list[ActionCall]): Actions to call
+
+        Returns:
+            list[Any]: Per-call results, in order. Failed calls return their exception.
+        """
+        return await asyncio.gather(
+            *[self.call_action(c.action_id, c.target, c.fields) for c in calls],
+            return_exceptions=True,
+        )
+
     async def listen_events(self) -> AsyncGenerator[Union[PluginEvent, None]]:
         yield None
@@ -0,0 +1,353 @@
+import asyncio
+import datetime
+import math
+import operator
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import AsyncGenerator, Iterator
+from typing import Any, Callable, Literal, Optional
+from pydantic import BaseModel, Field
+from .plugin import Plugin
+from .types import *
+
+EntityKey = tuple[str, str]
+
+OPERATIONS: dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "lt": operator.lt,
+    "ge": operator.ge,
+    "le": operator.le,
+}
+
+
+class PropertyFilter(BaseModel):
+    attribute: str
+    value: Any
+    operation: Literal["eq", "ne", "gt", "lt", "ge", "le"]
+
+
+class EntityQuery(BaseModel):
+    plugins: Optional[list[str]] = None
+    types: Optional[list[str]] = None
+    prefix: Optional[list[str]] = None
+    filters: list[PropertyFilter] = Field(default_factory=list)
+
+
+class EntityCursor(BaseModel):
+    plugin: str
+    entity_id: str
+
+
+class EntityPage(BaseModel):
+    entities: list[PluginEntity]
+    next: Optional[EntityCursor] = None
+
+
+class EntityQueryChange(BaseModel):
+    change: Literal["added", "updated", "removed"]
+    entity: PluginEntity
+
+
+def _key(entity: PluginEntity) -> EntityKey:
+    return (entity.plugin, entity.id)
+
+
+def _kind(value: Any) -> Optional[str]:
+    # Booleans compare as numbers, so they share the number bucket. NaN compares
+    # false against everything, which would break the sorted order.
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (bool, int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime.datetime):
+        # Naive & aware datetimes can't be compared, so they're indexed separately.
+        return "datetime" if value.tzinfo is None else "datetime_tz"
+    return None
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+def compile_query(query: EntityQuery) -> Callable[[PluginEntity], bool]:
+    """Compiles a query into a predicate over a single entity.
+
+    Args:
+        query (EntityQuery): Query to compile
+
+    Returns:
+        Callable[[PluginEntity], bool]: True if the entity matches every query condition
+    """
+    plugins = frozenset(query.plugins) if query.plugins != None else None
+    types = frozenset(query.types) if query.types != None else None
+    prefixes = tuple(query.prefix) if query.prefix else None
+    filters = [(f.attribute, OPERATIONS[f.operation], f.value) for f in query.filters]
+
+    def matches(entity: PluginEntity) -> bool:
+        if plugins != None and not entity.plugin in plugins:
+            return False
+        if types != None and not entity.type in types:
+            return False
+        if prefixes and not entity.id.startswith(prefixes):
+            return False
+        for attribute, compare, value in filters:
+            prop = entity.properties.get(attribute)
+            if not prop:
+                return False
+            try:
+                if not compare(prop.value, value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    return matches
+
+
+class QuerySubscription:
+    def __init__(self, index: "EntityIndex", query: EntityQuery):
+        self.index = index
+        self.query = query
+        self.matches = compile_query(query)
+        self.members: set[EntityKey] = set()
+        self.queue: asyncio.Queue[EntityQueryChange] = asyncio.Queue()
+
+    def _update(
+        self,
+        key: EntityKey,
+        entity: Optional[PluginEntity],
+        old: Optional[PluginEntity],
+    ):
+        was = key in self.members
+        now = entity != None and self.matches(entity)
+        if now:
+            self.members.add(key)
+            self.queue.put_nowait(
+                EntityQueryChange(change="updated" if was else "added", entity=entity)
+            )
+        elif was:
+            self.members.discard(key)
+            self.queue.put_nowait(
+                EntityQueryChange(change="removed", entity=entity or old)
+            )
+
+    def close(self):
+        self.index.unsubscribe(self)
+
+    async def __aiter__(self) -> AsyncGenerator[EntityQueryChange, None]:
+        while True:
+            yield await self.queue.get()
+
+
+class EntityIndex:
+    """Live entity state across plugins, with secondary indexes for queries.
+
+    Every entity is indexed by plugin & type. Property IDs passed as `indexed` also
+    get a hash index (eq lookups) and a sorted index per value kind (range lookups).
+    Index lookups only narrow candidates; every candidate is still checked against
+    the full query.
+    """
+
+    def __init__(self, indexed: Optional[list[str]] = None):
+        self.entities: dict[EntityKey, PluginEntity] = {}
+        self.by_plugin: dict[str, set[EntityKey]] = {}
+        self.by_type: dict[str, set[EntityKey]] = {}
+        self.hashed: dict[str, dict[Any, set[EntityKey]]] = {}
+        self.sorted: dict[str, dict[str, list[tuple[Any, EntityKey]]]] = {}
+        self.subscriptions: list[QuerySubscription] = []
+        # What each entity was indexed under. Plugins may mutate & re-emit the same
+        # PluginEntity, so unindexing can't rely on the stored object's values.
+        self._types: dict[EntityKey, str] = {}
+        self._values: dict[EntityKey, dict[str, Any]] = {}
+        for prop in indexed or []:
+            self.add_index(prop)
+
+    def add_index(self, prop: str):
+        if prop in self.hashed:
+            return
+        self.hashed[prop] = {}
+        self.sorted[prop] = {}
+        for key, entity in self.entities.items():
+            self._index_property(prop, key, entity)
+
+    def _index_property(self, prop: str, key: EntityKey, entity: PluginEntity):
+        if not prop in entity.properties:
+            return
+        value = entity.properties[prop].value
+        self._values.setdefault(key, {})[prop] = value
+        if _hashable(value):
+            self.hashed[prop].setdefault(value, set()).add(key)
+        kind = _kind(value)
+        if kind:
+            insort(self.sorted[prop].setdefault(kind, []), (value, key))
+
+    def _unindex_property(self, prop: str, key: EntityKey, value: Any):
+        if _hashable(value) and value in self.hashed[prop]:
+            self.hashed[prop][value].discard(key)
+            if len(self.hashed[prop][value]) == 0:
+                del self.hashed[prop][value]
+        kind = _kind(value)
+        if kind:
+            entries = self.sorted[prop][kind]
+            position = bisect_left(entries, (value, key))
+            if position < len(entries) and entries[position] == (value, key):
+                del entries[position]
+
+    def _add(self, key: EntityKey, entity: PluginEntity):
+        self.entities[key] = entity
+        self._types[key] = entity.type
+        self.by_plugin.setdefault(key[0], set()).add(key)
+        self.by_type.setdefault(entity.type, set()).add(key)
+        for prop in self.hashed.keys():
+            self._index_property(prop, key, entity)
+
+    def _remove(self, key: EntityKey) -> Optional[PluginEntity]:
+        entity = self.entities.pop(key, None)
+        if not entity:
+            return None
+        self.by_plugin[key[0]].discard(key)
+        self.by_type[self._types.pop(key)].discard(key)
+        for prop, value in self._values.pop(key, {}).items():
+            self._unindex_property(prop, key, value)
+        return entity
+
+    def upsert(self, entity: PluginEntity):
+        key = _key(entity)
+        old = self._remove(key)
+        self._add(key, entity)
+        for subscription in self.subscriptions:
+            subscription._update(key, entity, old)
+
+    def remove(self, plugin: str, entity_id: str):
+        key = (plugin, entity_id)
+        old = self._remove(key)
+        if old:
+            for subscription in self.subscriptions:
+                subscription._update(key, None, old)
+
+    def apply_event(self, event: PluginEvent):
+        if event.new_state:
+            self.upsert(event.new_state)
+
+    async def load(self, plugins: list[Plugin]):
+        """Loads the current entities of every plugin concurrently."""
+        for entities in await asyncio.gather(*[p.get_entities() for p in plugins]):
+            for entity in entities:
+                self.upsert(entity)
+
+    async def follow(self, plugin: Plugin):
+        """Keeps the index up to date from a plugin's event stream."""
+        async for event in plugin.listen_events():
+            if event:
+                self.apply_event(event)
+
+    def _range(self, prop: str, compare: PropertyFilter) -> Optional[set[EntityKey]]:
+        kind = _kind(compare.value)
+        if not kind:
+            return None
+        entries = self.sorted[prop].get(kind, [])
+        value = compare.value
+        # Keys sort after every other key of the same value when compared as (value, key).
+        low, high = (value, ()), (value, ("\U0010ffff",))
+        match compare.operation:
+            case "gt":
+                selected = entries[bisect_right(entries, high) :]
+            case "ge":
+                selected = entries[bisect_left(entries, low) :]
+            case "lt":
+                selected = entries[: bisect_left(entries, low)]
+            case "le":
+                selected = entries[: bisect_right(entries, high)]
+            case _:
+                return None
+        return {key for _, key in selected}
+
+    def _candidates(self, query: EntityQuery) -> Iterator[EntityKey]:
+        sets: list[set[EntityKey]] = []
+        if query.plugins != None:
+            sets.append(
+                set().union(*[self.by_plugin.get(p, set()) for p in query.plugins])
+            )
+        if query.types != None:
+            sets.append(
+                set().union(*[self.by_type.get(t, set()) for t in query.types])
+            )
+        for f in query.filters:
+            if not f.attribute in self.hashed:
+                continue
+            if f.operation == "eq":
+                if _hashable(f.value):
+                    sets.append(self.hashed[f.attribute].get(f.value, set()))
+            else:
+                selected = self._range(f.attribute, f)
+                if selected != None:
+                    sets.append(selected)
+
+        if len(sets) == 0:
+            return iter(list(self.entities.keys()))
+        sets.sort(key=len)
+        return iter(sets[0].intersection(*sets[1:]))
+
+    def query(
+        self,
+        query: EntityQuery,
+        limit: Optional[int] = None,
+        after: Optional[EntityCursor] = None,
+    ) -> EntityPage:
+        """Returns one page of matching entities, ordered by plugin & entity ID.
+
+        Args:
+            query (EntityQuery): Query to run
+            limit (Optional[int], optional): Maximum page size. Defaults to no limit.
+            after (Optional[EntityCursor], optional): Cursor from the previous page. Defaults to the first page.
+
+        Returns:
+            EntityPage: Matching entities & the cursor for the next page, if any
+        """
+        if limit != None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        matches = compile_query(query)
+        keys = sorted(k for k in self._candidates(query) if matches(self.entities[k]))
+        if after:
+            keys = keys[bisect_right(keys, (after.plugin, after.entity_id)) :]
+
+        if limit != None and len(keys) > limit:
+            keys = keys[:limit]
+            return EntityPage(
+                entities=[self.entities[k] for k in keys],
+                next=EntityCursor(plugin=keys[-1][0], entity_id=keys[-1][1]),
+            )
+        return EntityPage(entities=[self.entities[k] for k in keys])
+
+    def stream(self, query: EntityQuery) -> Iterator[PluginEntity]:
+        """Yields matching entities in no particular order, without sorting the result set."""
+        matches = compile_query(query)
+        for key in self._candidates(query):
+            entity = self.entities.get(key)
+            if entity and matches(entity):
+                yield entity
+
+    def subscribe(self, query: EntityQuery) -> QuerySubscription:
+        """Subscribes to changes in a query's result set.
+
+        Args:
+            query (EntityQuery): Query to watch
+
+        Returns:
+            QuerySubscription: Async iterable of EntityQueryChange events. Current matches are available in members.
+        """
+        subscription = QuerySubscription(self, query)
+        subscription.members = {_key(e) for e in self.stream(query)}
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: QuerySubscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
@@ -1,9 +1,7 @@
 import datetime
-from email.policy import default
 from io import FileIO
 from typing import Any, Literal, Optional, Union
 from pydantic import BaseModel, Field
-import yaml
 
 
 class PluginPypiDepenency(BaseModel):
@@ -58,6 +56,8 @@ class PluginConfig(BaseModel):
 
     @classmethod
     def from_manifest(cls, fd: FileIO) -> "PluginConfig":
+        import yaml
+
         raw = yaml.load(fd.read(), yaml.Loader)
         meta = raw["metadata"]
         run = raw["run"]
@@ -193,6 +193,13 @@ class EntityAction(BaseModel):
     display: DisplayData
     target_types: Union[list[str], None]
     fields: dict[str, ENTITY_ACTION_FIELDS]
+    version: Optional[str] = None
+
+
+class ActionCall(BaseModel):
+    action_id: str
+    target: Optional[str] = None
+    fields: dict[str, Any] = Field(default_factory=dict)
 
 
 class BaseEntityProperty(BaseModel):
@@ -0,0 +1,328 @@
+import datetime
+import math
+import re
+import weakref
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any, Callable, Literal, Optional
+from pydantic import BaseModel, Field
+from .types import *
+
+VALIDATOR_CACHE_SIZE = 512
+_HEX_COLOR = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+
+
+class ActionFieldError(BaseModel):
+    key: str
+    code: Literal[
+        "required", "type", "min", "max", "option", "prefix", "format", "schema"
+    ]
+    message: str
+
+
+class ActionValidationResult(BaseModel):
+    plugin: str
+    action: str
+    values: dict[str, Any] = Field(default_factory=dict)
+    errors: list[ActionFieldError] = Field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return len(self.errors) == 0
+
+
+class _FieldError(Exception):
+    def __init__(self, code: str, message: str):
+        self.code = code
+        self.message = message
+
+
+def _check_range(value: Any, minimum: Any, maximum: Any) -> Any:
+    if minimum is not None and value < minimum:
+        raise _FieldError("min", f"Value must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise _FieldError("max", f"Value must be at most {maximum}")
+    return value
+
+
+def _compile_string(field: StringActionField) -> Callable[[Any], Any]:
+    def check(value: Any) -> str:
+        if not isinstance(value, str):
+            raise _FieldError("type", "Expected a string")
+        return value
+
+    return check
+
+
+def _compile_number(field: NumberActionField) -> Callable[[Any], Any]:
+    decimals, minimum, maximum = field.decimals, field.min, field.max
+
+    def check(value: Any) -> int | float:
+        if isinstance(value, bool):
+            raise _FieldError("type", "Expected a number")
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                raise _FieldError("type", "Expected a number")
+        elif not isinstance(value, (int, float)):
+            raise _FieldError("type", "Expected a number")
+        if isinstance(value, float) and not math.isfinite(value):
+            raise _FieldError("format", "Expected a finite number")
+
+        if not decimals:
+            if isinstance(value, float):
+                if not value.is_integer():
+                    raise _FieldError("format", "Expected a whole number")
+                value = int(value)
+
+        return _check_range(value, minimum, maximum)
+
+    return check
+
+
+def _compile_boolean(field: BooleanActionField) -> Callable[[Any], Any]:
+    def check(value: Any) -> bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        raise _FieldError("type", "Expected a boolean")
+
+    return check
+
+
+def _compile_selection(field: SelectionActionField) -> Callable[[Any], Any]:
+    options = frozenset(o.value for o in field.options if not o.disabled)
+
+    def check_one(value: Any) -> str:
+        if not isinstance(value, str):
+            raise _FieldError("type", "Expected a string option")
+        if not value in options:
+            raise _FieldError("option", f"'{value}' is not an available option")
+        return value
+
+    if not field.multi:
+        return check_one
+
+    def check_many(value: Any) -> list[str]:
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            raise _FieldError("type", "Expected a list of options")
+        return [check_one(i) for i in value]
+
+    return check_many
+
+
+def _compile_temporal(
+    kind: type, parse: Callable[[str], Any], minimum: Any, maximum: Any
+) -> Callable[[Any], Any]:
+    def check(value: Any) -> Any:
+        if isinstance(value, str):
+            try:
+                value = parse(value)
+            except ValueError:
+                raise _FieldError("format", f"Expected an ISO {kind.__name__}")
+        if kind is datetime.date and isinstance(value, datetime.datetime):
+            value = value.date()
+        if not isinstance(value, kind):
+            raise _FieldError("type", f"Expected a {kind.__name__}")
+        try:
+            return _check_range(value, minimum, maximum)
+        except TypeError:
+            raise _FieldError("type", f"Cannot compare {kind.__name__} values")
+
+    return check
+
+
+def _compile_date(field: DateActionField) -> Callable[[Any], Any]:
+    return _compile_temporal(
+        datetime.date, datetime.date.fromisoformat, field.min, field.max
+    )
+
+
+def _compile_time(field: TimeActionField) -> Callable[[Any], Any]:
+    return _compile_temporal(
+        datetime.time, datetime.time.fromisoformat, field.min, field.max
+    )
+
+
+def _compile_datetime(field: DateTimeActionField) -> Callable[[Any], Any]:
+    return _compile_temporal(
+        datetime.datetime, datetime.datetime.fromisoformat, field.min, field.max
+    )
+
+
+def _compile_color(field: ColorActionField) -> Callable[[Any], Any]:
+    alpha = field.alpha
+
+    def check(value: Any) -> str:
+        if not isinstance(value, str):
+            raise _FieldError("type", "Expected a color string")
+        if value.startswith("#"):
+            if not _HEX_COLOR.match(value):
+                raise _FieldError("format", "Invalid hex color")
+            if len(value) == 9 and not alpha:
+                raise _FieldError("format", "Alpha channel is not allowed")
+        return value
+
+    return check
+
+
+def _compile_entity(field: EntitySelectorActionField) -> Callable[[Any], Any]:
+    prefixes = tuple(field.prefix)
+
+    def check(value: Any) -> str:
+        if not isinstance(value, str):
+            raise _FieldError("type", "Expected an entity ID")
+        if len(prefixes) > 0 and not value.startswith(prefixes):
+            raise _FieldError(
+                "prefix", f"Entity must start with one of {', '.join(prefixes)}"
+            )
+        return value
+
+    return check
+
+
+def _compile_json(field: JSONActionField) -> Callable[[Any], Any]:
+    return lambda value: value
+
+
+FIELD_COMPILERS: dict[str, Callable[[Any], Callable[[Any], Any]]] = {
+    "string": _compile_string,
+    "number": _compile_number,
+    "boolean": _compile_boolean,
+    "selection": _compile_selection,
+    "date": _compile_date,
+    "time": _compile_time,
+    "datetime": _compile_datetime,
+    "color": _compile_color,
+    "entity": _compile_entity,
+    "json": _compile_json,
+}
+
+
+class ActionValidator:
+    """Validates & coerces call_action field values against an EntityAction.
+
+    The field schema is interpreted once at construction; validate() only runs
+    the resulting per-field checks.
+    """
+
+    def __init__(self, action: EntityAction):
+        self.plugin = action.plugin
+        self.action = action.id
+        self.schema_errors: dict[str, ActionFieldError] = {}
+        self.fields: list[tuple[str, Callable[[Any], Any], Any, bool]] = []
+        for field in action.fields.values():
+            check = FIELD_COMPILERS[field.type](field)
+            self.fields.append(
+                (field.key, check, self._compile_default(field, check), field.required)
+            )
+
+    def _compile_default(self, field: BaseActionField, check: Callable[[Any], Any]) -> Any:
+        # Defaults go through the same coercion as user values, so plugins always
+        # receive one type per field. Invalid defaults are reported when used.
+        if field.default is None:
+            return None
+        try:
+            return check(field.default)
+        except _FieldError as e:
+            self.schema_errors[field.key] = ActionFieldError(
+                key=field.key,
+                code="schema",
+                message=f"Invalid default value: {e.message}",
+            )
+            return None
+
+    def validate(self, values: Optional[dict[str, Any]]) -> ActionValidationResult:
+        """Fills defaults, checks required fields & coerces provided values.
+
+        Args:
+            values (Optional[dict[str, Any]]): Raw field values (ie Macro.field_values)
+
+        Returns:
+            ActionValidationResult: Coerced values & any field errors. Unknown keys are dropped.
+        """
+        values = values or {}
+        result = {}
+        errors = []
+        for key, check, default, required in self.fields:
+            value = values.get(key)
+            if value is None:
+                if key in self.schema_errors:
+                    errors.append(self.schema_errors[key])
+                elif default is None and required:
+                    errors.append(
+                        ActionFieldError(
+                            key=key, code="required", message="Field is required"
+                        )
+                    )
+                else:
+                    result[key] = (
+                        deepcopy(default)
+                        if isinstance(default, (list, dict))
+                        else default
+                    )
+                continue
+
+            try:
+                result[key] = check(value)
+            except _FieldError as e:
+                errors.append(ActionFieldError(key=key, code=e.code, message=e.message))
+
+        return ActionValidationResult(
+            plugin=self.plugin, action=self.action, values=result, errors=errors
+        )
+
+
+_validators: "OrderedDict[tuple[str, str, str], ActionValidator]" = OrderedDict()
+_unversioned: dict[int, tuple[weakref.ref, ActionValidator]] = {}
+
+
+def get_validator(action: EntityAction) -> ActionValidator:
+    """Returns the cached validator for an action, compiling it if needed.
+
+    Versioned actions are cached by (plugin, id, version). Actions without a version
+    are cached per EntityAction instance, so they must not be modified once validated.
+
+    Args:
+        action (EntityAction): Action to validate against
+
+    Returns:
+        ActionValidator: Compiled validator
+    """
+    if action.version is None:
+        cached = _unversioned.get(id(action))
+        if cached and cached[0]() is action:
+            return cached[1]
+
+        validator = ActionValidator(action)
+        key = id(action)
+        _unversioned[key] = (
+            weakref.ref(action, lambda _: _unversioned.pop(key, None)),
+            validator,
+        )
+        return validator
+
+    key = (action.plugin, action.id, action.version)
+    validator = _validators.get(key)
+    if validator:
+        _validators.move_to_end(key)
+        return validator
+
+    validator = ActionValidator(action)
+    _validators[key] = validator
+    if len(_validators) > VALIDATOR_CACHE_SIZE:
+        _validators.popitem(last=False)
+    return validator
+
+
+def validate_action(
+    action: EntityAction, values: Optional[dict[str, Any]]
+) -> ActionValidationResult:
+    return get_validator(action).validate(values)
+
+
+def clear_validators():
+    _validators.clear()
+    _unversioned.clear()
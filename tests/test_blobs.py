@@ -0,0 +1,89 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+
+from haus_utils.models.blobs import BlobStore, LocalBlobStore, load_pyramid, store_image
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_local_store_dedupes_and_reads_ranges(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    first = run(store.put(b"0123456789", "text/plain"))
+    second = run(store.put(b"0123456789", "text/plain"))
+
+    assert first == second
+    assert run(store.read(first.hash)) == b"0123456789"
+    assert run(store.read(first.hash, 3, 7)) == b"3456"
+    assert run(store.read(first.hash, 8, 100)) == b"89"
+
+
+@pytest.mark.parametrize("hash", ["./../secret", "../" + "a" * 62, "A" * 64, ""])
+def test_local_store_rejects_invalid_hashes(tmp_path, hash):
+    (tmp_path / "secret").write_bytes(b"secret")
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+
+    for operation in (store.info(hash), store.read(hash), store.delete(hash)):
+        with pytest.raises(ValueError):
+            run(operation)
+    assert (tmp_path / "secret").exists()
+
+
+def test_store_image_builds_pyramid(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = BytesIO()
+    Image.new("RGB", (600, 300), "red").save(buffer, format="PNG")
+    store = LocalBlobStore(str(tmp_path))
+
+    image = run(store_image(store, buffer.getvalue(), "image/png", tile_size=256))
+
+    pyramid = run(load_pyramid(store, image))
+
+    assert (image.width, image.height) == (600, 300)
+    assert set(image.model_dump().keys()) == {
+        "hash",
+        "size",
+        "content_type",
+        "width",
+        "height",
+        "pyramid",
+    }
+    assert [(l.columns, l.rows) for l in pyramid.levels] == [(3, 2), (2, 1), (1, 1)]
+    assert pyramid.level_for(150).level == 2
+    assert pyramid.level_for(200).level == 1
+    assert run(store.exists(pyramid.levels[0].tile(2, 1)))
+
+
+def test_store_image_stores_nothing_on_invalid_image(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    with pytest.raises(Exception):
+        run(store_image(store, b"not an image", "image/png"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_local_store_concurrent_identical_puts(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    data = bytes(range(256)) * 40000
+
+    async def puts():
+        return await asyncio.gather(
+            *[store.put(data, "application/octet-stream") for _ in range(8)]
+        )
+
+    references = run(puts())
+
+    assert len({r.hash for r in references}) == 1
+    assert run(store.read(references[0].hash)) == data
+    assert [p.name for p in tmp_path.rglob("*.tmp")] == []
+
+
+def test_incomplete_store_fails_on_creation():
+    class Incomplete(BlobStore):
+        async def info(self, hash):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
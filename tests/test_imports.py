@@ -0,0 +1,73 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+resource = pytest.importorskip("resource")
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ["beanie", "motor", "pymongo", "yaml"]
+
+PLUGIN_ONLY = """
+import haus_utils
+haus_utils.Plugin
+haus_utils.PluginEntity
+"""
+
+FULL = """
+import haus_utils.models
+haus_utils.models.DOCUMENT_TYPES
+"""
+
+# On Linux ru_maxrss survives exec, so a child spawned from pytest would report
+# pytest's own peak. VmHWM is reset on exec; ru_maxrss is the fallback elsewhere.
+MEASURE = """
+import json, resource, sys, time
+start = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - start
+maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open("/proc/self/status") as f:
+        maxrss = next(int(l.split()[1]) for l in f if l.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    pass
+print(json.dumps({{
+    "elapsed": elapsed,
+    "maxrss": maxrss,
+    "modules": sorted(m.split(".")[0] for m in sys.modules),
+}}))
+"""
+
+# Generous absolute budget for the plugin-only cold start, in seconds.
+PLUGIN_IMPORT_BUDGET = 2.0
+
+
+def measure(code: str) -> dict:
+    runs = []
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(code=code)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output))
+    return min(runs, key=lambda r: r["elapsed"])
+
+
+def test_plugin_import_skips_database_dependencies():
+    result = measure(PLUGIN_ONLY)
+    loaded = set(result["modules"])
+    assert [m for m in HEAVY_MODULES if m in loaded] == []
+
+
+def test_plugin_import_is_cheaper_than_full_import():
+    plugin = measure(PLUGIN_ONLY)
+    full = measure(FULL)
+
+    assert plugin["elapsed"] < PLUGIN_IMPORT_BUDGET
+    assert plugin["maxrss"] < full["maxrss"]
@@ -0,0 +1,208 @@
+import asyncio
+from typing import Any
+
+from haus_utils.models.views import Macro
+from haus_utils.plugin import (
+    ActionCall,
+    DisplayData,
+    EntityAction,
+    MacroExecutor,
+    NumberActionField,
+    Plugin,
+)
+
+DISPLAY = DisplayData(label="Action")
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def macro(action_id=None, plugin_id="fake", **fields) -> Macro:
+    return Macro(
+        plugin_id=plugin_id,
+        action_id=action_id,
+        field_values=fields,
+        icon="icon",
+        tooltip="tooltip",
+    )
+
+
+class FakePlugin(Plugin):
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.calls: list[str] = []
+        self.get_actions_calls = 0
+
+    async def get_actions(self, ids: list[str] = None) -> list[EntityAction]:
+        self.get_actions_calls += 1
+        return [
+            EntityAction(
+                id=i,
+                plugin="fake",
+                category="test",
+                display=DISPLAY,
+                target_types=None,
+                fields={
+                    "level": NumberActionField(
+                        key="level",
+                        display=DISPLAY,
+                        advanced=False,
+                        default=0,
+                        required=False,
+                        example=None,
+                        min=0,
+                        max=100,
+                    )
+                },
+            )
+            for i in ids
+            if i != "missing"
+        ]
+
+    async def call_action(self, action_id: str, target: str, fields: dict[str, Any]):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.calls.append(action_id)
+        try:
+            await asyncio.sleep(self.delay)
+            if action_id == "fail":
+                raise RuntimeError("failed")
+            return action_id
+        finally:
+            self.running -= 1
+
+
+class BatchingPlugin(FakePlugin):
+    def __init__(self):
+        super().__init__()
+        self.batches: list[int] = []
+        self.batches_running = 0
+        self.batches_peak = 0
+
+    async def call_actions(self, calls: list[ActionCall]) -> list[Any]:
+        self.batches.append(len(calls))
+        self.batches_running += 1
+        self.batches_peak = max(self.batches_peak, self.batches_running)
+        await asyncio.sleep(self.delay)
+        self.batches_running -= 1
+        return [c.action_id for c in calls]
+
+
+class ShortPlugin(BatchingPlugin):
+    async def call_actions(self, calls: list[ActionCall]) -> list[Any]:
+        return []
+
+
+def test_default_limit_counts_calls():
+    plugin = FakePlugin()
+    executor = MacroExecutor({"fake": plugin}, concurrency=2)
+
+    results = run(executor.execute([macro(f"a{i}") for i in range(6)]))
+
+    assert [r.outcome for r in results] == ["success"] * 6
+    assert [r.result for r in results] == [f"a{i}" for i in range(6)]
+    assert plugin.peak == 2
+
+
+def test_per_plugin_limit_overrides_default():
+    plugin = FakePlugin()
+    executor = MacroExecutor({"fake": plugin}, concurrency=4, limits={"fake": 1})
+
+    run(executor.execute([macro(f"a{i}") for i in range(4)]))
+
+    assert plugin.peak == 1
+
+
+def test_native_batches_run_concurrently():
+    plugin = BatchingPlugin()
+    executor = MacroExecutor({"fake": plugin}, concurrency=4, batch_size=8)
+
+    results = run(executor.execute([macro(f"a{i}") for i in range(20)]))
+
+    assert all(r.outcome == "success" for r in results)
+    assert sorted(plugin.batches) == [4, 8, 8]
+    assert plugin.batches_peak == 3
+
+
+def test_dedupes_within_execute():
+    plugin = FakePlugin()
+    executor = MacroExecutor({"fake": plugin})
+
+    results = run(executor.execute([macro("a", level=5), macro("a", level=5)]))
+
+    assert plugin.calls == ["a"]
+    assert [r.outcome for r in results] == ["success", "success"]
+    assert [r.deduplicated for r in results] == [False, True]
+
+
+def test_dedupes_across_concurrent_executes():
+    plugin = FakePlugin(delay=0.05)
+    executor = MacroExecutor({"fake": plugin})
+
+    async def scenes():
+        return await asyncio.gather(
+            executor.execute([macro("a")]), executor.execute([macro("a")])
+        )
+
+    first, second = run(scenes())
+
+    assert plugin.calls == ["a"]
+    assert sorted([first[0].deduplicated, second[0].deduplicated]) == [False, True]
+    assert first[0].result == second[0].result == "a"
+
+
+def test_outcomes():
+    plugin = FakePlugin()
+    executor = MacroExecutor({"fake": plugin})
+
+    results = run(
+        executor.execute(
+            [
+                macro(None),
+                macro("a", level=500),
+                macro("missing"),
+                macro("a", plugin_id="unknown"),
+                macro("fail"),
+                macro("a", level=50),
+            ]
+        )
+    )
+
+    assert [r.outcome for r in results] == [
+        "skipped",
+        "invalid",
+        "error",
+        "error",
+        "error",
+        "success",
+    ]
+    assert results[1].validation_errors[0].code == "max"
+    assert results[2].error == "Unknown action"
+    assert results[3].error == "Unknown plugin"
+    assert results[4].error == "RuntimeError: failed"
+
+
+def test_actions_are_cached_until_invalidated():
+    plugin = FakePlugin()
+    executor = MacroExecutor({"fake": plugin})
+
+    run(executor.execute([macro("a")]))
+    run(executor.execute([macro("a")]))
+    assert plugin.get_actions_calls == 1
+
+    executor.invalidate("fake")
+    run(executor.execute([macro("a")]))
+    assert plugin.get_actions_calls == 2
+
+
+def test_call_actions_length_mismatch():
+    executor = MacroExecutor({"fake": ShortPlugin()})
+
+    results = run(executor.execute([macro("a"), macro("b")]))
+
+    assert [r.outcome for r in results] == ["error", "error"]
+    assert all(r.error.startswith("RuntimeError") for r in results)
+    assert executor._inflight == {}
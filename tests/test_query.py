@@ -0,0 +1,225 @@
+import asyncio
+import math
+import random
+
+import pytest
+
+from haus_utils.plugin import (
+    BooleanEntityProperty,
+    DisplayData,
+    EntityIndex,
+    EntityQuery,
+    NumberEntityProperty,
+    PluginEntity,
+    PropertyFilter,
+    StringEntityProperty,
+)
+
+DISPLAY = DisplayData(label="Entity")
+OPERATIONS = ["eq", "ne", "gt", "lt", "ge", "le"]
+QUERY_VALUES = {
+    "on": [True, False, 0, 1, 0.5, 2, "on"],
+    "level": [0, 25, 50.5, 100, True, "50", math.nan],
+    "name": ["a", "m", "z", 1],
+}
+
+
+def entity(rng: random.Random, index: int) -> PluginEntity:
+    return PluginEntity(
+        id=f"entity.{index}",
+        plugin=rng.choice(["hue", "zwave", "mqtt"]),
+        type=rng.choice(["light", "switch", "sensor"]),
+        display=DISPLAY,
+        properties={
+            "on": BooleanEntityProperty(
+                id="on", display=DISPLAY, value=rng.random() < 0.5
+            ),
+            "level": NumberEntityProperty(
+                id="level",
+                display=DISPLAY,
+                value=rng.choice([rng.randint(0, 100), rng.random() * 100, math.nan]),
+            ),
+            "name": StringEntityProperty(
+                id="name", display=DISPLAY, value=rng.choice("abcmxyz")
+            ),
+        },
+    )
+
+
+def random_query(rng: random.Random) -> EntityQuery:
+    filters = []
+    for _ in range(rng.randint(1, 2)):
+        attribute = rng.choice(list(QUERY_VALUES.keys()))
+        filters.append(
+            PropertyFilter(
+                attribute=attribute,
+                operation=rng.choice(OPERATIONS),
+                value=rng.choice(QUERY_VALUES[attribute]),
+            )
+        )
+    return EntityQuery(
+        plugins=rng.choice([None, ["hue"], ["hue", "mqtt"]]),
+        types=rng.choice([None, ["light"], ["switch", "sensor"]]),
+        filters=filters,
+    )
+
+
+def ids(page) -> list[str]:
+    return [(e.plugin, e.id) for e in page.entities]
+
+
+def test_indexed_and_unindexed_results_match():
+    rng = random.Random(30)
+    indexed = EntityIndex(indexed=list(QUERY_VALUES.keys()))
+    plain = EntityIndex()
+    for i in range(300):
+        e = entity(rng, i)
+        indexed.upsert(e)
+        plain.upsert(e)
+    for i in range(0, 300, 7):
+        e = entity(rng, i)
+        indexed.upsert(e)
+        plain.upsert(e)
+    # Plugins may mutate an entity in place & re-emit it.
+    for key in rng.sample(sorted(indexed.entities.keys()), 40):
+        e = indexed.entities[key]
+        e.type = rng.choice(["light", "switch", "sensor"])
+        e.properties["level"].value = rng.choice([rng.randint(0, 100), math.nan])
+        e.properties["on"].value = not e.properties["on"].value
+        indexed.upsert(e)
+        plain.upsert(e)
+
+    for _ in range(1000):
+        query = random_query(rng)
+        assert ids(indexed.query(query)) == ids(plain.query(query)), query
+
+
+def test_boolean_property_range_filter_uses_index():
+    index = EntityIndex(indexed=["on"])
+    rng = random.Random(1)
+    for i in range(20):
+        index.upsert(entity(rng, i))
+    query = EntityQuery(
+        filters=[PropertyFilter(attribute="on", operation="le", value=1)]
+    )
+
+    assert len(index.query(query).entities) == 20
+
+
+def test_paging():
+    index = EntityIndex()
+    rng = random.Random(2)
+    for i in range(10):
+        index.upsert(entity(rng, i))
+
+    pages = []
+    page = index.query(EntityQuery(), limit=3)
+    pages.append(page)
+    while page.next:
+        page = index.query(EntityQuery(), limit=3, after=page.next)
+        pages.append(page)
+
+    assert [len(p.entities) for p in pages] == [3, 3, 3, 1]
+    assert sum([ids(p) for p in pages], []) == ids(index.query(EntityQuery()))
+    with pytest.raises(ValueError):
+        index.query(EntityQuery(), limit=0)
+
+
+def level_entity(id: str, level, type: str = "light") -> PluginEntity:
+    return PluginEntity(
+        id=id,
+        plugin="hue",
+        type=type,
+        display=DISPLAY,
+        properties={
+            "level": NumberEntityProperty(id="level", display=DISPLAY, value=level)
+        },
+    )
+
+
+def test_nan_values_are_not_range_indexed():
+    index = EntityIndex(indexed=["level"])
+    plain = EntityIndex()
+    for i, level in enumerate([5, math.nan, 3, 7, 1, math.nan, 9, 2]):
+        index.upsert(level_entity(f"e{i}", level))
+        plain.upsert(level_entity(f"e{i}", level))
+
+    for operation in ("gt", "ge", "lt", "le"):
+        query = EntityQuery(
+            filters=[PropertyFilter(attribute="level", operation=operation, value=4)]
+        )
+        assert ids(index.query(query)) == ids(plain.query(query))
+
+
+def test_in_place_mutation_is_unindexed():
+    index = EntityIndex(indexed=["level"])
+    e = level_entity("lamp", 10)
+    index.upsert(e)
+
+    e.properties["level"].value = 20
+    e.type = "switch"
+    index.upsert(e)
+
+    key = ("hue", "lamp")
+    assert index.sorted["level"]["number"] == [(20, key)]
+    assert index.hashed["level"] == {20: {key}}
+    assert index.by_type["light"] == set()
+    assert index.by_type["switch"] == {key}
+
+    index.remove("hue", "lamp")
+    assert index.sorted["level"]["number"] == []
+    assert index.hashed["level"] == {}
+
+
+def changes(subscription) -> list[tuple[str, str]]:
+    result = []
+    while not subscription.queue.empty():
+        change = subscription.queue.get_nowait()
+        result.append((change.change, change.entity.id))
+    return result
+
+
+def test_subscription_changes():
+    index = EntityIndex(indexed=["level"])
+    index.upsert(level_entity("existing", 80))
+    subscription = index.subscribe(
+        EntityQuery(
+            types=["light"],
+            filters=[PropertyFilter(attribute="level", operation="gt", value=50)],
+        )
+    )
+    assert subscription.members == {("hue", "existing")}
+
+    index.upsert(level_entity("dim", 10))
+    index.upsert(level_entity("bright", 90))
+    index.upsert(level_entity("bright", 95))
+    index.upsert(level_entity("bright", 40))
+    index.upsert(level_entity("existing", 80, type="switch"))
+    index.upsert(level_entity("dim", 60))
+    index.remove("hue", "dim")
+    index.remove("hue", "missing")
+
+    assert changes(subscription) == [
+        ("added", "bright"),
+        ("updated", "bright"),
+        ("removed", "bright"),
+        ("removed", "existing"),
+        ("added", "dim"),
+        ("removed", "dim"),
+    ]
+    assert subscription.members == set()
+
+    subscription.close()
+    index.upsert(level_entity("late", 99))
+    assert changes(subscription) == []
+
+
+def test_subscription_is_async_iterable():
+    async def first_change():
+        index = EntityIndex()
+        subscription = index.subscribe(EntityQuery(types=["light"]))
+        index.upsert(level_entity("lamp", 1))
+        return await asyncio.wait_for(anext(aiter(subscription)), 1)
+
+    change = asyncio.run(first_change())
+    assert (change.change, change.entity.id) == ("added", "lamp")
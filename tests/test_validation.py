@@ -0,0 +1,158 @@
+import datetime
+
+import pytest
+
+from haus_utils.plugin.types import (
+    DateActionField,
+    DateTimeActionField,
+    DisplayData,
+    EntityAction,
+    EntitySelectorActionField,
+    NumberActionField,
+    SelectionActionField,
+    SelectionActionOptions,
+    StringActionField,
+)
+from haus_utils.plugin.validation import (
+    clear_validators,
+    get_validator,
+    validate_action,
+)
+
+DISPLAY = DisplayData(label="Field")
+
+
+def field(cls, key: str, default=None, required=False, **kwargs):
+    return cls(
+        key=key,
+        display=DISPLAY,
+        advanced=False,
+        default=default,
+        required=required,
+        example=None,
+        **kwargs,
+    )
+
+
+def action(*fields, id: str = "action", version=None) -> EntityAction:
+    return EntityAction(
+        id=id,
+        plugin="plugin",
+        category="test",
+        display=DISPLAY,
+        target_types=None,
+        fields={f.key: f for f in fields},
+        version=version,
+    )
+
+
+def codes(result) -> dict[str, str]:
+    return {e.key: e.code for e in result.errors}
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    clear_validators()
+    yield
+    clear_validators()
+
+
+def test_required_and_defaults():
+    a = action(
+        field(StringActionField, "name", required=True),
+        field(StringActionField, "label", default="light"),
+        field(StringActionField, "note"),
+        field(DateActionField, "day", default="2024-05-01", min=None, max=None),
+        field(DateActionField, "broken", default="not a date", min=None, max=None),
+    )
+
+    result = validate_action(a, {"broken": "2024-01-01"})
+    assert codes(result) == {"name": "required"}
+    assert result.values == {
+        "label": "light",
+        "note": None,
+        "day": datetime.date(2024, 5, 1),
+        "broken": datetime.date(2024, 1, 1),
+    }
+
+    result = validate_action(a, {"name": "x"})
+    assert codes(result) == {"broken": "schema"}
+
+
+def test_number_coercion():
+    a = action(
+        field(NumberActionField, "n", min=-5, max=10),
+        field(NumberActionField, "whole", decimals=False),
+    )
+
+    assert validate_action(a, {"n": "2.5", "whole": "3"}).values == {
+        "n": 2.5,
+        "whole": 3,
+    }
+    assert codes(validate_action(a, {"n": "abc"})) == {"n": "type"}
+    assert codes(validate_action(a, {"n": True})) == {"n": "type"}
+    assert codes(validate_action(a, {"n": -6})) == {"n": "min"}
+    assert codes(validate_action(a, {"n": 11})) == {"n": "max"}
+    assert codes(validate_action(a, {"whole": 2.5})) == {"whole": "format"}
+    for value in (float("nan"), "nan", float("inf"), "-inf"):
+        assert codes(validate_action(a, {"n": value})) == {"n": "format"}
+
+
+def test_selection():
+    options = [
+        SelectionActionOptions(value="a", label=None),
+        SelectionActionOptions(value="b", label=None),
+        SelectionActionOptions(value="off", label=None, disabled=True),
+    ]
+    a = action(
+        field(SelectionActionField, "one", options=options),
+        field(SelectionActionField, "many", options=options, multi=True),
+    )
+
+    assert validate_action(a, {"one": "a", "many": ("a", "b")}).values == {
+        "one": "a",
+        "many": ["a", "b"],
+    }
+    assert codes(validate_action(a, {"one": "off"})) == {"one": "option"}
+    assert codes(validate_action(a, {"one": ["a"]})) == {"one": "type"}
+    assert codes(validate_action(a, {"many": "a"})) == {"many": "type"}
+    assert codes(validate_action(a, {"many": ["a", "c"]})) == {"many": "option"}
+
+
+def test_datetime_bounds():
+    minimum = datetime.datetime(2024, 1, 1)
+    a = action(field(DateTimeActionField, "at", min=minimum, max=None))
+
+    result = validate_action(a, {"at": "2024-06-01T12:00:00"})
+    assert result.values["at"] == datetime.datetime(2024, 6, 1, 12)
+    assert codes(validate_action(a, {"at": "2023-06-01T12:00:00"})) == {"at": "min"}
+    assert codes(validate_action(a, {"at": "2024-06-01T12:00:00+00:00"})) == {
+        "at": "type"
+    }
+
+
+def test_entity_prefix():
+    a = action(field(EntitySelectorActionField, "target", prefix=["light.", "switch."]))
+
+    assert validate_action(a, {"target": "light.kitchen"}).valid
+    assert codes(validate_action(a, {"target": "sensor.door"})) == {"target": "prefix"}
+    assert codes(validate_action(a, {"target": 3})) == {"target": "type"}
+
+
+def test_versioned_cache():
+    first = action(field(StringActionField, "s"), version="1")
+    same = action(field(StringActionField, "s"), version="1")
+    bumped = action(field(StringActionField, "s"), version="2")
+    other = action(field(StringActionField, "s"), id="other", version="1")
+
+    assert get_validator(first) is get_validator(same)
+    assert get_validator(first) is not get_validator(bumped)
+    assert get_validator(first) is not get_validator(other)
+
+
+def test_unversioned_cache_is_per_instance():
+    first = action(field(StringActionField, "s"))
+    copy = action(field(StringActionField, "s"))
+
+    assert get_validator(first) is get_validator(first)
+    assert get_validator(first) is not get_validator(copy)